@@ -1,24 +1,45 @@
 ﻿import sys
-import argparse
+import os
+import functools
+import itertools
 import logging
-import logging.handlers
+import mmap
+import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Dict, List, Any
-import xml.etree.ElementTree as ET
+from types import MappingProxyType
+from typing import Optional, List, Any, Mapping, NamedTuple, Tuple
 
 try:
-    import ftd2xx as ftd
+    from lxml import etree as ET
+    HAVE_LXML = True
 except ImportError:
-    print("Error: ftd2xx library not found. Install with: pip install ftd2xx")
-    sys.exit(1)
+    import xml.etree.ElementTree as ET
+    HAVE_LXML = False
 
-try:
-    import wx
-except ImportError:
-    print("Warning: wxPython not found. GUI mode will not be available.")
-    print("Install with: pip install wxPython")
-    wx = None
+# ftd2xx loads the native FTDI driver, so it is only imported once a device
+# is actually needed (see _ftd)
+ftd = None
+
+
+def _ftd():
+    """Import ftd2xx on first use and return the module"""
+    global ftd
+    if ftd is None:
+        try:
+            import ftd2xx
+        except ImportError:
+            print("Error: ftd2xx library not found. Install with: pip install ftd2xx")
+            sys.exit(1)
+        ftd = ftd2xx
+    return ftd
+
+
+# wxPython is only imported when the GUI is launched (see load_gui), so CLI
+# runs don't pay for loading it
+wx = None
 
 
 # ============================================================================
@@ -101,7 +122,22 @@ def setup_logging(log_level: str = 'INFO', log_to_file: bool = False,
     """
     logger = logging.getLogger('relay_control')
     logger.setLevel(getattr(logging, log_level))
-    logger.handlers.clear()
+
+    if log_to_file and log_file_path is None:
+        log_dir = Path.home() / '.relay_control'
+        log_dir.mkdir(exist_ok=True)
+        log_file_path = log_dir / 'relay_control.log'
+
+    # Handlers only depend on the log file, so a repeat call that at most
+    # changes the level keeps them (and the open log file) as they are
+    handler_config = (log_to_file, str(log_file_path) if log_to_file else None)
+    if logger.handlers and getattr(logger, '_relay_control_handlers', None) == handler_config:
+        return logger
+
+    for handler in logger.handlers[:]:
+        logger.removeHandler(handler)
+        handler.close()
+    logger._relay_control_handlers = handler_config
 
     # Console handler
     console_handler = logging.StreamHandler()
@@ -111,12 +147,9 @@ def setup_logging(log_level: str = 'INFO', log_to_file: bool = False,
 
     # File handler (optional)
     if log_to_file:
-        if log_file_path is None:
-            log_dir = Path.home() / '.relay_control'
-            log_dir.mkdir(exist_ok=True)
-            log_file_path = log_dir / 'relay_control.log'
+        from logging.handlers import RotatingFileHandler
 
-        file_handler = logging.handlers.RotatingFileHandler(
+        file_handler = RotatingFileHandler(
             log_file_path,
             maxBytes=5 * 1024 * 1024,
             backupCount=5
@@ -127,7 +160,7 @@ def setup_logging(log_level: str = 'INFO', log_to_file: bool = False,
         )
         file_handler.setFormatter(file_formatter)
         logger.addHandler(file_handler)
-        logger.info(f"Logging to file: {log_file_path}")
+        logger.info("Logging to file: %s", log_file_path)
 
     return logger
 
@@ -154,6 +187,46 @@ DEFAULT_SETTINGS = {
     'last_tab': 0,
 }
 
+# Read-only view handed out by load_settings when there is no settings file
+_DEFAULT_SETTINGS_RO = MappingProxyType(DEFAULT_SETTINGS)
+
+
+_TRUE_STRINGS = frozenset({'true', 'True', 'TRUE', '1', 'yes', 'on'})
+
+
+def _parse_bool(text: str) -> bool:
+    """Parse an XML boolean, anything not in _TRUE_STRINGS is False"""
+    return text in _TRUE_STRINGS
+
+
+def _parse_path(text: str) -> Optional[Path]:
+    """Parse an optional path, empty text means unset"""
+    return Path(text) if text else None
+
+
+# XML element name -> (settings key, coercer). Element names are unique across
+# the CLI, Connection and GUI sections, so the section itself is not needed.
+_SETTINGS_DISPATCH = {
+    # CLI
+    'QuietMode': ('cli_quiet_mode', _parse_bool),
+    'VerboseMode': ('cli_verbose_mode', _parse_bool),
+    'DefaultDuration': ('default_duration', float),
+    'LogLevel': ('log_level', str),
+    'LogToFile': ('log_to_file', _parse_bool),
+    'LogFilePath': ('log_file_path', _parse_path),
+    # Connection
+    'AutoDisconnectEnabled': ('auto_disconnect_enabled', _parse_bool),
+    'AutoDisconnectTimeout': ('auto_disconnect_timeout', int),
+    'AutoConnectOnStartup': ('auto_connect_startup', _parse_bool),
+    'LastUsedDevice': ('last_device', str),
+    # GUI
+    'WindowWidth': ('window_width', int),
+    'WindowHeight': ('window_height', int),
+    'WindowX': ('window_x', int),
+    'WindowY': ('window_y', int),
+    'LastTab': ('last_tab', int),
+}
+
 
 def get_settings_path(custom_path: Optional[str] = None) -> Path:
     """Get path to settings file"""
@@ -165,53 +238,48 @@ def get_settings_path(custom_path: Optional[str] = None) -> Path:
     return settings_dir / 'settings.xml'
 
 
-def load_settings(custom_path: Optional[str] = None) -> Dict[str, Any]:
-    """Load settings from XML, return defaults if missing"""
-    settings = DEFAULT_SETTINGS.copy()
+def load_settings(custom_path: Optional[str] = None) -> Mapping[str, Any]:
+    """
+    Load settings from XML, return defaults if missing.
+    The result is read-only and shared; use dict(settings) to get a copy to modify.
+    """
     settings_file = get_settings_path(custom_path)
 
-    if not settings_file.exists():
-        return settings
+    try:
+        stat = os.stat(settings_file)
+    except FileNotFoundError:
+        return _DEFAULT_SETTINGS_RO
+
+    return _load_settings_cached(str(settings_file), stat.st_mtime_ns, stat.st_size)
+
+
+@functools.lru_cache(maxsize=4)
+def _load_settings_cached(settings_file: str, mtime_ns: int, size: int) -> Mapping[str, Any]:
+    """
+    Parse settings XML. Cached per (path, mtime, size) so an unchanged file is
+    only parsed once per process.
+    """
+    settings = DEFAULT_SETTINGS.copy()
 
     try:
-        tree = ET.parse(settings_file)
-        root = tree.getroot()
-
-        # Parse CLI settings
-        cli = root.find('CLI')
-        if cli is not None:
-            settings['cli_quiet_mode'] = cli.findtext('QuietMode', 'false').lower() == 'true'
-            settings['cli_verbose_mode'] = cli.findtext('VerboseMode', 'false').lower() == 'true'
-            settings['default_duration'] = float(cli.findtext('DefaultDuration', '0.5'))
-            settings['log_level'] = cli.findtext('LogLevel', 'INFO')
-            settings['log_to_file'] = cli.findtext('LogToFile', 'false').lower() == 'true'
-            log_path = cli.findtext('LogFilePath')
-            settings['log_file_path'] = Path(log_path) if log_path else None
-
-        # Parse Connection settings
-        conn = root.find('Connection')
-        if conn is not None:
-            settings['auto_disconnect_enabled'] = conn.findtext('AutoDisconnectEnabled', 'true').lower() == 'true'
-            settings['auto_disconnect_timeout'] = int(conn.findtext('AutoDisconnectTimeout', '30'))
-            settings['auto_connect_startup'] = conn.findtext('AutoConnectOnStartup', 'false').lower() == 'true'
-            settings['last_device'] = conn.findtext('LastUsedDevice')
-
-        # Parse GUI settings
-        gui = root.find('GUI')
-        if gui is not None:
-            settings['window_width'] = int(gui.findtext('WindowWidth', '800'))
-            settings['window_height'] = int(gui.findtext('WindowHeight', '600'))
-            settings['window_x'] = int(gui.findtext('WindowX', '100'))
-            settings['window_y'] = int(gui.findtext('WindowY', '100'))
-            settings['last_tab'] = int(gui.findtext('LastTab', '0'))
+        # Single pass over the document: each leaf is coerced and stored as
+        # soon as it closes, and cleared so no tree is retained
+        with open(settings_file, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for _, elem in ET.iterparse(mm, events=('end',)):
+                field = _SETTINGS_DISPATCH.get(elem.tag)
+                if field is not None:
+                    key, parse = field
+                    settings[key] = parse(elem.text or '')
+                elem.clear()
 
     except Exception as e:
-        logging.getLogger('relay_control').warning(f"Failed to load settings: {e}. Using defaults.")
+        logging.getLogger('relay_control').warning("Failed to load settings: %s. Using defaults.", e)
 
-    return settings
+    return MappingProxyType(settings)
 
 
-def save_settings(settings: Dict[str, Any], custom_path: Optional[str] = None):
+def save_settings(settings: Mapping[str, Any], custom_path: Optional[str] = None):
     """Save settings to XML"""
     settings_file = get_settings_path(custom_path)
 
@@ -243,10 +311,21 @@ def save_settings(settings: Dict[str, Any], custom_path: Optional[str] = None):
     ET.SubElement(gui, 'WindowY').text = str(settings['window_y'])
     ET.SubElement(gui, 'LastTab').text = str(settings['last_tab'])
 
-    # Write to file
+    # Write to a temp file and rename it over the old one, so a crash mid-write
+    # can't leave a truncated settings file behind
+    # (lxml pretty-prints in C for free, ElementTree writes compact XML)
     tree = ET.ElementTree(root)
-    ET.indent(tree, space='  ')
-    tree.write(settings_file, encoding='utf-8', xml_declaration=True)
+    tmp_file = settings_file.with_suffix(settings_file.suffix + '.tmp')
+    try:
+        if HAVE_LXML:
+            tree.write(str(tmp_file), encoding='utf-8', xml_declaration=True, pretty_print=True)
+        else:
+            tree.write(str(tmp_file), encoding='utf-8', xml_declaration=True)
+        os.replace(tmp_file, settings_file)
+    except OSError:
+        if tmp_file.exists():
+            tmp_file.unlink()
+        raise
 
 
 # ============================================================================
@@ -256,51 +335,92 @@ def save_settings(settings: Dict[str, Any], custom_path: Optional[str] = None):
 logger = logging.getLogger('relay_control')
 
 
-def list_devices() -> List[Dict[str, Any]]:
+class DeviceInfo(NamedTuple):
+    """One FTDI device as reported by list_devices"""
+    index: int
+    description: str
+    serial: str
+    type: int
+
+
+# Last successful enumeration as (time.monotonic(), devices). Each
+# enumeration walks the USB bus, and hotplug is slower than this TTL.
+_DEVICE_CACHE_TTL = 2.0
+_device_cache: Optional[Tuple[float, List[DeviceInfo]]] = None
+
+
+def list_devices(refresh: bool = False) -> List[DeviceInfo]:
     """
     Returns list of FTDI devices.
+    A result less than _DEVICE_CACHE_TTL seconds old is reused unless refresh is set.
     Raises: NoDevicesFoundError if no devices found
     """
+    global _device_cache
+
+    now = time.monotonic()
+    if not refresh and _device_cache and now - _device_cache[0] < _DEVICE_CACHE_TTL:
+        return list(_device_cache[1])
+
+    ftd2xx = _ftd()
     try:
-        num_devices = ftd.createDeviceInfoList()
+        num_devices = ftd2xx.createDeviceInfoList()
         if num_devices == 0:
             raise NoDevicesFoundError()
 
 
-        devices = []
-        for i in range(num_devices):
-            info = ftd.getDeviceInfoDetail(i)
-            devices.append({
-                'index': i,
-                'description': info['description'].decode('utf-8') if isinstance(info['description'], bytes) else info[
-                    'description'],
-                'serial': info['serial'].decode('utf-8') if isinstance(info['serial'], bytes) else info['serial'],
-                'type': info['type']
-            })
+        infos = [ftd2xx.getDeviceInfoDetail(i) for i in range(num_devices)]
 
-        logger.info(f"Found {num_devices} FTDI device(s)")
-        return devices
+        # A given ftd2xx build returns either bytes or str throughout, so check once
+        decode = bytes.decode if isinstance(infos[0]['description'], bytes) else str
+        devices = [
+            DeviceInfo(
+                index=i,
+                description=decode(info['description']),
+                serial=decode(info['serial']),
+                type=info['type']
+            )
+            for i, info in enumerate(infos)
+        ]
+
+        logger.info("Found %d FTDI device(s)", num_devices)
+        _device_cache = (now, devices)
+        return list(devices)
 
-    except ftd.DeviceError as e:
-        logger.error(f"FTDI driver error: {e}")
+    except ftd2xx.DeviceError as e:
+        logger.error("FTDI driver error: %s", e)
         #raise RelayControlException(f"FTDI driver error: {e}", ExitCode.FTDI_DRIVER_ERROR)
         return []
     except Exception as e:
-        logger.error(f"Unexpected error listing devices: {e}")
+        logger.error("Unexpected error listing devices: %s", e)
         #raise RelayControlException(str(e), ExitCode.GENERAL_ERROR)
         return []
 
 
+# ftd2xx only reports failures as message text ("DEVICE_NOT_FOUND", ...); one
+# pass picks out the ones we map to specific exit codes
+_FTDI_ERROR_RE = re.compile(
+    r'(?P<not_found>device[ _]not[ _]found|not[ _]open)|(?P<in_use>access[ _]denied|claimed)',
+    re.IGNORECASE
+)
+
+
+def _classify_ftdi_error(error: Exception) -> Optional[str]:
+    """Return 'not_found', 'in_use' or None for an ftd2xx DeviceError"""
+    match = _FTDI_ERROR_RE.search(str(error))
+    return match.lastgroup if match else None
+
+
 def connect_device(serial_number: str):
     """
     Opens device and initializes bit bang mode.
     Returns: device handle
     Raises: DeviceNotFoundError, ConnectionFailedError
     """
+    ftd2xx = _ftd()
     try:
-        logger.info(f"Attempting to connect to device: {serial_number}")
+        logger.info("Attempting to connect to device: %s", serial_number)
 
-        handle = ftd.openEx(serial_number.encode('utf-8'))
+        handle = ftd2xx.openEx(serial_number.encode('utf-8'))
 
         logger.debug("Setting baud rate to 9600")
         handle.setBaudRate(9600)
@@ -311,17 +431,17 @@ def connect_device(serial_number: str):
         logger.info("Device connected successfully")
         return handle
 
-    except ftd.DeviceError as e:
-        logger.error(f"Failed to connect: {e}")
-        error_str = str(e).lower()
-        if "device not found" in error_str or "not open" in error_str:
+    except ftd2xx.DeviceError as e:
+        logger.error("Failed to connect: %s", e)
+        error_kind = _classify_ftdi_error(e)
+        if error_kind == 'not_found':
             raise DeviceNotFoundError(serial_number)
-        elif "access denied" in error_str or "claimed" in error_str:
+        elif error_kind == 'in_use':
             raise RelayControlException("Device in use by another application", ExitCode.DEVICE_IN_USE)
         else:
             raise ConnectionFailedError(str(e))
     except Exception as e:
-        logger.error(f"Unexpected connection error: {e}")
+        logger.error("Unexpected connection error: %s", e)
         raise ConnectionFailedError(str(e))
 
 
@@ -332,7 +452,7 @@ def disconnect_device(handle):
             handle.close()
             logger.info("Device disconnected")
     except Exception as e:
-        logger.warning(f"Error during disconnect: {e}")
+        logger.warning("Error during disconnect: %s", e)
 
 
 def get_relay_state(handle) -> int:
@@ -342,45 +462,92 @@ def get_relay_state(handle) -> int:
     """
     try:
         state = handle.getBitMode()
-        logger.debug(f"Read relay state: 0x{state:02X}")
+        logger.debug("Read relay state: 0x%02X", state)
         return state
     except Exception as e:
-        logger.error(f"Failed to read relay state: {e}")
+        logger.error("Failed to read relay state: %s", e)
         raise DeviceDisconnectedError()
 
 
+# One-byte write payload for every possible pin state, so writes don't allocate
+_MASK_BYTES = tuple(bytes([i]) for i in range(256))
+
+
 def set_relay_state(handle, relay_mask: int):
     """
     Writes relay state to device.
     Raises: DeviceDisconnectedError, CommandExecutionFailedError
     """
+    ftd2xx = _ftd()
     try:
-        logger.debug(f"Writing relay state: 0x{relay_mask:02X}")
-        handle.write(bytes([relay_mask]))
+        logger.debug("Writing relay state: 0x%02X", relay_mask)
+        handle.write(_MASK_BYTES[relay_mask & 0xFF])
         logger.info("Relay state set successfully")
 
-    except ftd.DeviceError as e:
-        logger.error(f"Failed to write relay state: {e}")
-        if "device not found" in str(e).lower():
+    except ftd2xx.DeviceError as e:
+        logger.error("Failed to write relay state: %s", e)
+        if _classify_ftdi_error(e) == 'not_found':
             raise DeviceDisconnectedError()
         else:
             raise RelayControlException(f"Command execution failed: {e}", ExitCode.COMMAND_EXECUTION_FAILED)
     except Exception as e:
-        logger.error(f"Unexpected error setting relay state: {e}")
+        logger.error("Unexpected error setting relay state: %s", e)
         raise RelayControlException(str(e), ExitCode.COMMAND_EXECUTION_FAILED)
 
 
+# Bit mask for every combination of relays 1-4, keyed by frozenset so order
+# and duplicates in the command line don't matter
+_RELAY_MASKS = {
+    frozenset(combo): sum(1 << (relay - 1) for relay in combo)
+    for count in range(5)
+    for combo in itertools.combinations((1, 2, 3, 4), count)
+}
+
+
 def relays_to_mask(relay_list: List[int]) -> int:
     """Convert relay numbers (1-4) to bit mask"""
-    mask = 0
-    for relay in relay_list:
-        mask |= (1 << (relay - 1))
+    mask = _RELAY_MASKS.get(frozenset(relay_list))
+    if mask is None:
+        mask = 0
+        for relay in relay_list:
+            mask |= (1 << (relay - 1))
     return mask
 
 
-def pulse_relays(handle, relay_list: List[int], duration: float):
-    """Momentary pulse with auto-restore to previous state"""
-    current_state = get_relay_state(handle)
+def _precise_sleep(duration: float):
+    """
+    Sleep for duration seconds without time.sleep's coarse (~15ms on Windows)
+    overshoot: sleep through most of it, then spin for the last 2ms.
+    """
+    if duration <= 0:
+        return
+
+    end = time.perf_counter() + duration
+    coarse = duration - 0.002
+
+    if coarse > 0.001:
+        if sys.platform == 'win32':
+            # Raise the system timer resolution to 1ms just for this sleep
+            import ctypes
+            winmm = ctypes.windll.winmm
+            winmm.timeBeginPeriod(1)
+            try:
+                time.sleep(coarse)
+            finally:
+                winmm.timeEndPeriod(1)
+        else:
+            time.sleep(coarse)
+
+    while time.perf_counter() < end:
+        pass
+
+
+def pulse_relays(handle, relay_list: List[int], duration: float, known_state: Optional[int] = None):
+    """
+    Momentary pulse with auto-restore to previous state.
+    Pass known_state when the caller has just written it, to skip reading it back.
+    """
+    current_state = known_state if known_state is not None else get_relay_state(handle)
     relay_mask = relays_to_mask(relay_list)
 
     # Turn on specified relays
@@ -388,12 +555,12 @@ def pulse_relays(handle, relay_list: List[int], duration: float):
     set_relay_state(handle, new_state)
 
     # Wait
-    logger.debug(f"Pulsing relays {relay_list} for {duration}s")
-    time.sleep(duration)
+    logger.debug("Pulsing relays %s for %ss", relay_list, duration)
+    _precise_sleep(duration)
 
     # Restore previous state
     set_relay_state(handle, current_state)
-    logger.info(f"Relays {relay_list} pulsed and restored")
+    logger.info("Relays %s pulsed and restored", relay_list)
 
 
 # ============================================================================
@@ -409,7 +576,7 @@ def validate_relay_numbers(relay_list: Optional[List[int]], flag_name: str):
         if not isinstance(relay, int) or not (1 <= relay <= 4):
             raise InvalidRelayNumberError(f"{flag_name}: {relay}")
 
-    logger.debug(f"Validated relay numbers for {flag_name}: {relay_list}")
+    logger.debug("Validated relay numbers for %s: %s", flag_name, relay_list)
 
 
 def validate_arguments(args):
@@ -425,15 +592,14 @@ def validate_arguments(args):
         raise ConflictingFlagsError("--state cannot be used with --on, --off, or --toggle")
 
     # Check for same relay in conflicting operations
-    relay_ops = {}
-    if args.on:
-        for r in args.on:
-            relay_ops[r] = 'on'
-    if args.off:
-        for r in args.off:
-            if r in relay_ops:
-                raise ConflictingFlagsError(f"Relay {r} specified in both --{relay_ops[r]} and --off")
-            relay_ops[r] = 'off'
+    relay_ops = (('--on', set(args.on or ())),
+                 ('--off', set(args.off or ())),
+                 ('--toggle', set(args.toggle or ())))
+    for (flag_a, relays_a), (flag_b, relays_b) in itertools.combinations(relay_ops, 2):
+        overlap = relays_a & relays_b
+        if overlap:
+            relays = ', '.join(map(str, sorted(overlap)))
+            raise ConflictingFlagsError(f"Relay {relays} specified in both {flag_a} and {flag_b}")
 
     # Validate duration only with momentary
     if args.duration is not None and not args.momentary:
@@ -442,11 +608,11 @@ def validate_arguments(args):
     logger.debug("Argument validation passed")
 
 
-def select_device_interactively(devices: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+def select_device_interactively(devices: List[DeviceInfo]) -> Optional[DeviceInfo]:
     """Prompt user to select from multiple devices"""
     print("\nMultiple FTDI devices found:")
     for idx, dev in enumerate(devices):
-        print(f"  [{idx}] {dev['description']} (Serial: {dev['serial']})")
+        print(f"  [{idx}] {dev.description} (Serial: {dev.serial})")
     print("  [X] Exit without connecting")
 
     while True:
@@ -474,11 +640,11 @@ def select_device_interactively(devices: List[Dict[str, Any]]) -> Optional[Dict[
             return None
 
 
-def select_device(devices: List[Dict[str, Any]], args) -> Dict[str, Any]:
+def select_device(devices: List[DeviceInfo], args) -> DeviceInfo:
     """Select device based on args or prompt user"""
     if args.device_serial:
         for dev in devices:
-            if dev['serial'] == args.device_serial:
+            if dev.serial == args.device_serial:
                 return dev
         raise DeviceNotFoundError(args.device_serial)
 
@@ -500,44 +666,56 @@ def select_device(devices: List[Dict[str, Any]], args) -> Dict[str, Any]:
         return device
 
 
-def execute_relay_commands(handle, args, settings: Dict[str, Any], show_output: bool):
+def execute_relay_commands(handle, args, settings: Mapping[str, Any], show_output: bool):
     """Execute relay commands based on parsed arguments"""
 
     # Get duration from args or settings
     duration = args.duration if args.duration is not None else settings['default_duration']
 
-    # Execute --state (absolute state)
+    # Device state as known after --state/--on/--off/--toggle, if any ran
+    new_state = None
+
+    # Execute --state (absolute state, no need to read the device first)
     if args.state:
-        mask = relays_to_mask(args.state)
-        set_relay_state(handle, mask)
+        new_state = relays_to_mask(args.state)
+        set_relay_state(handle, new_state)
         if show_output:
             print(f"Set absolute state: Relays {args.state} ON, others OFF")
 
-    # Execute --on, --off, --toggle (modify existing state)
-    else:
+    # Execute --on, --off, --toggle (modify existing state, one read and at most one write)
+    elif args.on or args.off or args.toggle:
         current_state = get_relay_state(handle)
+        new_state = current_state
 
         if args.on:
-            current_state |= relays_to_mask(args.on)
+            new_state |= relays_to_mask(args.on)
             if show_output:
                 print(f"Turned ON: Relays {args.on}")
 
         if args.off:
-            current_state &= ~relays_to_mask(args.off)
+            new_state &= ~relays_to_mask(args.off)
             if show_output:
                 print(f"Turned OFF: Relays {args.off}")
 
         if args.toggle:
-            current_state ^= relays_to_mask(args.toggle)
+            new_state ^= relays_to_mask(args.toggle)
             if show_output:
                 print(f"Toggled: Relays {args.toggle}")
 
-        if args.on or args.off or args.toggle:
-            set_relay_state(handle, current_state)
+        # A following --momentary pulse writes new_state plus the pulsed relays
+        # anyway, so that write can carry this change too. Not if a pulsed
+        # relay is being switched off here, that off/on edge must stay visible.
+        pulse_mask = relays_to_mask(args.momentary) if args.momentary else 0
+        if new_state == current_state:
+            logger.debug("Relay state unchanged, skipping write")
+        elif pulse_mask and not (current_state & ~new_state & pulse_mask):
+            logger.debug("Relay state change folded into momentary pulse")
+        else:
+            set_relay_state(handle, new_state)
 
     # Execute --momentary (pulse)
     if args.momentary:
-        pulse_relays(handle, args.momentary, duration)
+        pulse_relays(handle, args.momentary, duration, known_state=new_state)
         if show_output:
             print(f"Pulsed relays {args.momentary} for {duration}s")
 
@@ -590,27 +768,36 @@ EXIT CODES:
 """
 
 
+def print_devices(devices: List[DeviceInfo]):
+    """Print the --list-devices table"""
+    print("Available FTDI devices:")
+    for idx, dev in enumerate(devices):
+        print(f"  [{idx}] {dev.description} (Serial: {dev.serial})")
+
+
 def main_cli(args):
     """CLI mode handler with comprehensive error handling"""
 
-    settings = load_settings(args.config if hasattr(args, 'config') and args.config else None)
+    logger = logging.getLogger('relay_control')
+
+    # Fast path for scripted discovery: no settings parse or log handler setup
+    # unless the caller asked for verbose or file logging
+    if not (args.list_devices and not (args.verbose or args.log_file)):
+        settings = load_settings(args.config if hasattr(args, 'config') and args.config else None)
 
-    log_level = 'ERROR' if args.quiet else ('DEBUG' if args.verbose else settings['log_level'])
-    logger = setup_logging(
-        log_level=log_level,
-        log_to_file=args.log_file is not None or settings['log_to_file'],
-        log_file_path=Path(args.log_file) if args.log_file else settings.get('log_file_path')
-    )
+        log_level = 'ERROR' if args.quiet else ('DEBUG' if args.verbose else settings['log_level'])
+        logger = setup_logging(
+            log_level=log_level,
+            log_to_file=args.log_file is not None or settings['log_to_file'],
+            log_file_path=Path(args.log_file) if args.log_file else settings.get('log_file_path')
+        )
 
-    logger.info("=== CLI Mode Started ===")
+        logger.info("=== CLI Mode Started ===")
 
     try:
         # Handle --list-devices
         if args.list_devices:
-            devices = list_devices()
-            print("Available FTDI devices:")
-            for idx, dev in enumerate(devices):
-                print(f"  [{idx}] {dev['description']} (Serial: {dev['serial']})")
+            print_devices(list_devices())
             sys.exit(ExitCode.SUCCESS)
 
         # Validate arguments
@@ -621,10 +808,10 @@ def main_cli(args):
         device = select_device(devices, args)
 
         if not args.quiet:
-            print(f"Connecting to: {device['description']} (Serial: {device['serial']})")
+            print(f"Connecting to: {device.description} (Serial: {device.serial})")
 
         # Connect
-        handle = connect_device(device['serial'])
+        handle = connect_device(device.serial)
 
         try:
             # Execute commands
@@ -640,7 +827,7 @@ def main_cli(args):
             disconnect_device(handle)
 
     except RelayControlException as e:
-        logger.error(f"Error: {e.message}")
+        logger.error("Error: %s", e.message)
         print(f"Error: {e.message}", file=sys.stderr)
         sys.exit(e.exit_code)
 
@@ -659,22 +846,95 @@ def main_cli(args):
 # GUI (wxPython)
 # ============================================================================
 
-if wx:
+RelayControlFrame = None
+
+
+def load_gui():
+    """
+    Import wxPython and define the GUI frame class on first use
+
+    Returns:
+        The RelayControlFrame class
+
+    Raises:
+        ImportError: If wxPython is not installed
+    """
+    global wx, RelayControlFrame
+    if RelayControlFrame is not None:
+        return RelayControlFrame
+
+    import wx
+
     class RelayControlFrame(wx.Frame):
+        # Clicks arriving within this many seconds are merged into one write
+        WRITE_COALESCE_DELAY = 0.005
+
         def __init__(self):
             super().__init__(None, title="SainSmart 4-Relay Control", size=(800, 600))
 
-            self.settings = load_settings()
+            self.settings = dict(load_settings())
+            self.settings_dirty = False
             self.handle = None
+            # Set once the window starts closing; I/O results arriving after
+            # that are discarded
+            self.closing = False
+            self.devices = []
             self.is_connected = False
-            self.relay_states = [False, False, False, False]
+            # Relay mask as last requested, read from the device only on connect,
+            # and the mask the LEDs show (last confirmed by the device)
+            self.state_mask = 0
+            self.shown_mask = 0
+
+            # All FTDI I/O runs on this single worker thread so the event loop
+            # never waits on USB; results come back through wx.CallAfter.
+            # io_lock serializes use of self.handle with disconnect().
+            self.io_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='relay_io')
+            self.io_lock = threading.Lock()
+
+            # Single-slot outbound queue: the latest (mask, CLI args) to write,
+            # and whether a flush job is queued or running (GUI thread only)
+            self.pending_write = (0, '')
+            self.writing = False
+            # Mask last written to (or read from) the device, guarded by io_lock
+            self.written_mask = 0
+
+            # Start of the CLI command shown for the connected device
+            self.cli_prefix = ''
+
+            # "On" green and default text colour, shared by the connection
+            # status text and the LEDs
+            self.colour_on = wx.Colour(0, 200, 0)
+            self.colour_off = wx.SystemSettings.GetColour(wx.SYS_COLOUR_WINDOWTEXT)
+
+            # Relay LEDs swap between two prebuilt bitmaps of the same size, so
+            # a state change is a redraw with no re-layout
+            self.led_on_bitmap = self.create_led_bitmap(self.colour_on)
+            self.led_off_bitmap = self.create_led_bitmap(wx.Colour(190, 190, 190))
 
             self.init_ui()
             self.Centre()
+            self.Bind(wx.EVT_CLOSE, self.on_close)
+            self.Bind(wx.EVT_IDLE, self.on_idle)
 
             # Setup logging for GUI
             setup_logging(log_level=self.settings['log_level'])
 
+        def create_led_bitmap(self, colour):
+            """Draw a 16x16 round LED in the given colour, transparent around it"""
+            # Fill with a key colour that is then masked out, so themed page
+            # backgrounds show through instead of a square
+            key_colour = wx.Colour(255, 0, 255)
+            bitmap = wx.Bitmap(16, 16)
+            dc = wx.MemoryDC(bitmap)
+            dc.SetBackground(wx.Brush(key_colour))
+            dc.Clear()
+            dc.SetPen(wx.Pen(wx.Colour(100, 100, 100)))
+            dc.SetBrush(wx.Brush(colour))
+            dc.DrawCircle(8, 8, 6)
+            dc.SelectObject(wx.NullBitmap)
+            bitmap.SetMaskColour(key_colour)
+            return bitmap
+
         def init_ui(self):
             """Initialize the user interface"""
             panel = wx.Panel(self)
@@ -760,11 +1020,38 @@ if wx:
             title.SetFont(title_font)
             sizer.Add(title, 0, wx.ALL, 10)
 
-            # Create relay controls
+            # Relay controls: one grid row per relay (label, ON, OFF, TOGGLE, LED)
+            # laid out directly on the tab panel
+            grid = wx.FlexGridSizer(4, 5, 4, 4)
+            grid.AddGrowableCol(4)
             self.relay_controls = []
-            for i in range(4):
-                relay_panel = self.create_relay_control(panel, i + 1)
-                sizer.Add(relay_panel, 0, wx.EXPAND | wx.ALL, 5)
+            for relay_num in range(1, 5):
+                label = wx.StaticText(panel, label=f"Relay {relay_num}:")
+                grid.Add(label, 0, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, 5)
+
+                on_btn = wx.Button(panel, label="ON", size=(60, -1))
+                on_btn.Bind(wx.EVT_BUTTON, functools.partial(self.on_relay_on, relay_num))
+                grid.Add(on_btn)
+
+                off_btn = wx.Button(panel, label="OFF", size=(60, -1))
+                off_btn.Bind(wx.EVT_BUTTON, functools.partial(self.on_relay_off, relay_num))
+                grid.Add(off_btn)
+
+                toggle_btn = wx.Button(panel, label="TOGGLE", size=(80, -1))
+                toggle_btn.Bind(wx.EVT_BUTTON, functools.partial(self.on_relay_toggle, relay_num))
+                grid.Add(toggle_btn)
+
+                status = wx.StaticBitmap(panel, bitmap=self.led_off_bitmap)
+                grid.Add(status, 0, wx.ALIGN_CENTER_VERTICAL | wx.LEFT, 10)
+
+                self.relay_controls.append({
+                    'on_btn': on_btn,
+                    'off_btn': off_btn,
+                    'toggle_btn': toggle_btn,
+                    'status': status
+                })
+
+            sizer.Add(grid, 0, wx.EXPAND | wx.ALL, 10)
 
             # All on/off buttons
             all_sizer = wx.BoxSizer(wx.HORIZONTAL)
@@ -783,48 +1070,6 @@ if wx:
             panel.SetSizer(sizer)
             return panel
 
-        def create_relay_control(self, parent, relay_num):
-            """Create control panel for a single relay"""
-            panel = wx.Panel(parent)
-            sizer = wx.BoxSizer(wx.HORIZONTAL)
-
-            # Relay label
-            label = wx.StaticText(panel, label=f"Relay {relay_num}:")
-            sizer.Add(label, 0, wx.ALIGN_CENTER_VERTICAL | wx.ALL, 5)
-
-            # ON button
-            on_btn = wx.Button(panel, label="ON", size=(60, -1))
-            on_btn.Bind(wx.EVT_BUTTON, lambda evt: self.on_relay_on(relay_num))
-            sizer.Add(on_btn, 0, wx.ALL, 2)
-
-            # OFF button
-            off_btn = wx.Button(panel, label="OFF", size=(60, -1))
-            off_btn.Bind(wx.EVT_BUTTON, lambda evt: self.on_relay_off(relay_num))
-            sizer.Add(off_btn, 0, wx.ALL, 2)
-
-            # TOGGLE button
-            toggle_btn = wx.Button(panel, label="TOGGLE", size=(80, -1))
-            toggle_btn.Bind(wx.EVT_BUTTON, lambda evt: self.on_relay_toggle(relay_num))
-            sizer.Add(toggle_btn, 0, wx.ALL, 2)
-
-            # Status indicator
-            status = wx.StaticText(panel, label="○")
-            status.SetFont(wx.Font(14, wx.FONTFAMILY_DEFAULT, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_BOLD))
-            sizer.Add(status, 0, wx.ALIGN_CENTER_VERTICAL | wx.LEFT, 10)
-
-            panel.SetSizer(sizer)
-
-            # Store controls for later reference
-            self.relay_controls.append({
-                'panel': panel,
-                'on_btn': on_btn,
-                'off_btn': off_btn,
-                'toggle_btn': toggle_btn,
-                'status': status
-            })
-
-            return panel
-
         def create_cli_panel(self, parent):
             """Create CLI command display panel"""
             panel = wx.Panel(parent)
@@ -834,7 +1079,7 @@ if wx:
             sizer.Add(label, 0, wx.ALL, 5)
 
             self.cli_text = wx.TextCtrl(panel, style=wx.TE_READONLY, size=(-1, 60))
-            self.cli_text.SetValue("# Connect to device first")
+            self.set_cli_text("# Connect to device first")
             sizer.Add(self.cli_text, 0, wx.EXPAND | wx.ALL, 5)
 
             btn_sizer = wx.BoxSizer(wx.HORIZONTAL)
@@ -849,36 +1094,52 @@ if wx:
             panel.SetSizer(sizer)
             return panel
 
-        def refresh_devices(self):
-            """Scan for FTDI devices and populate dropdown"""
-            try:
-                devices = list_devices()
-
-                device_labels = []
-                for dev in devices:
-                    device_labels.append(f"{dev['description']} (Serial: {dev['serial']})")
-
-                self.device_choice.SetItems(device_labels)
-                self.devices = devices
-
-                # Auto-select last used device or first device
-                if self.settings['last_device']:
-                    for idx, dev in enumerate(devices):
-                        if dev['serial'] == self.settings['last_device']:
-                            self.device_choice.SetSelection(idx)
-                            break
-                    else:
-                        self.device_choice.SetSelection(0)
-                else:
-                    self.device_choice.SetSelection(0)
+        def refresh_devices(self, refresh: bool = False, status: Optional[str] = None):
+            """Scan for FTDI devices on the I/O thread and populate dropdown when done
+
+            Args:
+                refresh: Bypass the device list cache
+                status: Status bar text to show once the list is populated
+            """
+            self.refresh_btn.Enable(False)
+            self.connect_btn.Enable(False)
 
-                self.connect_btn.Enable(True)
+            def scan_devices():
+                devices = list_devices(refresh=refresh)
+                wx.CallAfter(self.populate_device_choice, devices, status)
 
-            except NoDevicesFoundError:
-                self.device_choice.SetItems(["No devices found"])
-                self.device_choice.SetSelection(0)
-                self.devices = []
-                self.connect_btn.Enable(False)
+            self.io_executor.submit(scan_devices)
+
+        def populate_device_choice(self, devices: List[DeviceInfo], status: Optional[str] = None):
+            """Fill the device dropdown with a finished scan's results"""
+            if self.closing:
+                return
+
+            self.devices = devices
+            self.refresh_btn.Enable(True)
+
+            device_labels = [f"{dev.description} (Serial: {dev.serial})" for dev in devices]
+            if not device_labels:
+                device_labels = ["No devices found"]
+
+            # Rescans usually find the same devices, so relabel the existing
+            # entries in place and only rebuild the list when the count changes
+            choice = self.device_choice
+            if choice.GetCount() == len(device_labels):
+                for idx, label in enumerate(device_labels):
+                    if choice.GetString(idx) != label:
+                        choice.SetString(idx, label)
+            else:
+                choice.SetItems(device_labels)
+
+            # Auto-select last used device or first device
+            index_by_serial = {dev.serial: idx for idx, dev in enumerate(devices)}
+            choice.SetSelection(index_by_serial.get(self.settings['last_device'], 0))
+
+            self.connect_btn.Enable(bool(devices))
+
+            if status:
+                self.SetStatusText(status)
 
         def on_refresh(self, event):
             """Handle refresh button click"""
@@ -887,8 +1148,8 @@ if wx:
                               "Device Connected", wx.OK | wx.ICON_WARNING)
                 return
 
-            self.refresh_devices()
-            self.SetStatusText("Device list refreshed")
+            self.SetStatusText("Scanning for devices...")
+            self.refresh_devices(refresh=True, status="Device list refreshed")
 
         def on_connect(self, event):
             """Handle connect/disconnect button click"""
@@ -898,7 +1159,7 @@ if wx:
                 self.connect()
 
         def connect(self):
-            """Connect to selected device"""
+            """Connect to selected device on the I/O thread"""
             if not self.devices:
                 wx.MessageBox("No devices available to connect.",
                               "No Devices", wx.OK | wx.ICON_ERROR)
@@ -910,44 +1171,84 @@ if wx:
 
             device = self.devices[selected_idx]
 
-            try:
-                self.handle = connect_device(device['serial'])
-                self.is_connected = True
+            def open_device():
+                try:
+                    handle = connect_device(device.serial)
+                    try:
+                        state = get_relay_state(handle)
+                    except RelayControlException:
+                        disconnect_device(handle)
+                        raise
+                except RelayControlException as e:
+                    wx.CallAfter(self.on_connect_failed, e)
+                else:
+                    wx.CallAfter(self.on_connected, device, handle, state)
+
+            # No rescans while connecting; they would reset the dropdown and
+            # buttons underneath the new connection
+            self.connect_btn.Enable(False)
+            self.refresh_btn.Enable(False)
+            self.SetStatusText(f"Connecting to {device.description}...")
+            self.io_executor.submit(open_device)
+
+        def on_connected(self, device, handle, current_state):
+            """Finish connecting once the I/O thread has opened the device"""
+            if self.closing:
+                # The window closed while connecting; nothing will use this handle
+                disconnect_device(handle)
+                return
 
-                # Read initial state
-                current_state = get_relay_state(self.handle)
-                for i in range(4):
-                    self.relay_states[i] = bool(current_state & (1 << i))
-                self.update_status_leds()
+            with self.io_lock:
+                self.handle = handle
+                self.written_mask = current_state & 0x0F
+            self.is_connected = True
+            self.cli_prefix = f"sainsmart_fdti_relay_control.exe --device-serial {device.serial}"
 
-                # Update UI
-                self.status_text.SetLabel("● Connected")
-                self.status_text.SetForegroundColour(wx.Colour(0, 200, 0))
-                self.connect_btn.SetLabel("Disconnect")
-                self.device_choice.Enable(False)
-                self.refresh_btn.Enable(False)
+            # Show initial state
+            mask = current_state & 0x0F
+            self.state_mask = self.shown_mask = mask
+            self.update_status_leds()
 
-                self.update_control_states()
+            # Update UI
+            self.status_text.SetLabel("● Connected")
+            self.status_text.SetForegroundColour(self.colour_on)
+            self.connect_btn.SetLabel("Disconnect")
+            self.connect_btn.Enable(True)
+            self.device_choice.Enable(False)
+            self.refresh_btn.Enable(False)
 
-                # Save last used device
-                self.settings['last_device'] = device['serial']
-                save_settings(self.settings)
+            self.update_control_states()
+
+            # Remember last used device; written to disk once the GUI is idle
+            if self.settings['last_device'] != device.serial:
+                self.settings['last_device'] = device.serial
+                self.settings_dirty = True
+
+            self.SetStatusText(f"Connected to {device.description} on COM port")
 
-                self.SetStatusText(f"Connected to {device['description']} on COM port")
+        def on_connect_failed(self, error):
+            """Report a failed connection attempt"""
+            if self.closing:
+                return
 
-            except RelayControlException as e:
-                wx.MessageBox(f"Failed to connect:\n{e.message}",
-                              "Connection Error", wx.OK | wx.ICON_ERROR)
+            self.connect_btn.Enable(True)
+            self.refresh_btn.Enable(True)
+            self.SetStatusText("Ready | Not connected")
+            wx.MessageBox(f"Failed to connect:\n{error.message}",
+                          "Connection Error", wx.OK | wx.ICON_ERROR)
 
         def disconnect(self):
             """Disconnect from device"""
-            disconnect_device(self.handle)
-            self.handle = None
+            # Taking the lock waits out an in-flight command; anything still
+            # queued sees handle is None and is dropped
+            with self.io_lock:
+                handle, self.handle = self.handle, None
+            self.io_executor.submit(disconnect_device, handle)
             self.is_connected = False
 
             # Update UI
             self.status_text.SetLabel("○ Disconnected")
-            self.status_text.SetForegroundColour(wx.SystemSettings.GetColour(wx.SYS_COLOUR_WINDOWTEXT))
+            self.status_text.SetForegroundColour(self.colour_off)
             self.connect_btn.SetLabel("Connect")
             self.device_choice.Enable(True)
             self.refresh_btn.Enable(True)
@@ -955,150 +1256,189 @@ if wx:
             self.update_control_states()
 
             self.SetStatusText("Disconnected")
-            self.cli_text.SetValue("# Connect to device first")
+            self.cli_prefix = ''
+            self.set_cli_text("# Connect to device first")
+
+        def on_close(self, event):
+            """Disconnect and let queued I/O finish before the window goes away"""
+            self.closing = True
+            if self.is_connected:
+                self.disconnect()
+            self.io_executor.shutdown(wait=True)
+            self.flush_settings()
+            event.Skip()
+
+        def on_idle(self, event):
+            """Write changed settings once there are no events left to handle"""
+            if self.settings_dirty:
+                self.flush_settings()
+            event.Skip()
+
+        def flush_settings(self):
+            """Save settings to disk if they changed since the last save"""
+            if not self.settings_dirty:
+                return
+            self.settings_dirty = False
+            try:
+                save_settings(self.settings)
+            except OSError as e:
+                logger.warning("Could not save settings: %s", e)
 
         def update_control_states(self):
             """Enable/disable controls based on connection state"""
-            for controls in self.relay_controls:
-                controls['on_btn'].Enable(self.is_connected)
-                controls['off_btn'].Enable(self.is_connected)
-                controls['toggle_btn'].Enable(self.is_connected)
+            # Freeze so the individual Enable calls repaint once, not per button
+            enabled = self.is_connected
+            self.Freeze()
+            try:
+                for controls in self.relay_controls:
+                    controls['on_btn'].Enable(enabled)
+                    controls['off_btn'].Enable(enabled)
+                    controls['toggle_btn'].Enable(enabled)
 
-            if hasattr(self, 'all_on_btn'):
-                self.all_on_btn.Enable(self.is_connected)
-                self.all_off_btn.Enable(self.is_connected)
+                if hasattr(self, 'all_on_btn'):
+                    self.all_on_btn.Enable(enabled)
+                    self.all_off_btn.Enable(enabled)
+            finally:
+                self.Thaw()
 
         def update_status_leds(self):
-            """Update LED indicators based on relay states"""
-            for i, controls in enumerate(self.relay_controls):
-                if self.relay_states[i]:
-                    controls['status'].SetLabel("●")
-                    controls['status'].SetForegroundColour(wx.Colour(0, 200, 0))
-                else:
-                    controls['status'].SetLabel("○")
-                    controls['status'].SetForegroundColour(wx.SystemSettings.GetColour(wx.SYS_COLOUR_WINDOWTEXT))
-
-        def on_relay_on(self, relay_num):
-            """Turn on specific relay"""
-            if not self.is_connected:
-                return
-
+            """Update LED indicators based on the shown relay mask"""
+            mask = self.shown_mask
+            on_bitmap, off_bitmap = self.led_on_bitmap, self.led_off_bitmap
+            self.Freeze()
             try:
-                current_state = get_relay_state(self.handle)
-                new_state = current_state | (1 << (relay_num - 1))
-                set_relay_state(self.handle, new_state)
+                for bit, controls in zip((1, 2, 4, 8), self.relay_controls):
+                    controls['status'].SetBitmap(on_bitmap if mask & bit else off_bitmap)
+            finally:
+                self.Thaw()
+
+        def write_relay_state(self, new_state, cli_args):
+            """
+            Queue new_state for the I/O thread, then show it and the equivalent
+            CLI command. state_mask is updated right away so the next click
+            builds on it without reading the device back. At most one write is
+            in flight; clicks made meanwhile only replace its target, which
+            on_write_done sends once the current write finishes.
+            """
+            self.state_mask = new_state
+            self.pending_write = (new_state, cli_args)
+
+            if not self.writing:
+                self.writing = True
+                self.io_executor.submit(self.flush_relay_state)
+
+        def flush_relay_state(self):
+            """Write the latest requested relay state (runs on the I/O thread)"""
+            time.sleep(self.WRITE_COALESCE_DELAY)
+            new_state, cli_args = self.pending_write
+
+            error = None
+            with self.io_lock:
+                # Skipped if disconnected while queued, or if the outputs
+                # already hold this mask (e.g. ON for a relay that is on, or a
+                # burst of toggles that cancelled out)
+                if self.handle is not None and new_state != self.written_mask:
+                    try:
+                        set_relay_state(self.handle, new_state)
+                        self.written_mask = new_state
+                    except RelayControlException as e:
+                        error = e
+            wx.CallAfter(self.on_write_done, new_state, cli_args, error)
+
+        def on_write_done(self, new_state, cli_args, error):
+            """Show a finished write and send the target if clicks changed it"""
+            if self.closing:
+                return
 
-                self.relay_states[relay_num - 1] = True
-                self.update_status_leds()
+            self.writing = False
+            if error is not None:
+                self.on_relay_io_error(error)
+                return
 
-                device = self.devices[self.device_choice.GetSelection()]
-                self.cli_text.SetValue(
-                    f"sainsmart_fdti_relay_control.exe --device-serial {device['serial']} --on {relay_num}"
-                )
+            self.apply_relay_state(new_state, cli_args)
 
-            except RelayControlException as e:
-                wx.MessageBox(f"Command failed:\n{e.message}",
-                              "Error", wx.OK | wx.ICON_ERROR)
-                if isinstance(e, DeviceDisconnectedError):
-                    self.disconnect()
+            if self.is_connected and self.pending_write != (new_state, cli_args):
+                self.writing = True
+                self.io_executor.submit(self.flush_relay_state)
 
-        def on_relay_off(self, relay_num):
-            """Turn off specific relay"""
+        def apply_relay_state(self, new_state, cli_args):
+            """Show a relay state written by the I/O thread"""
             if not self.is_connected:
                 return
 
+            # LEDs and CLI text (all four at once for ALL ON/OFF) in one repaint
+            self.Freeze()
             try:
-                current_state = get_relay_state(self.handle)
-                new_state = current_state & ~(1 << (relay_num - 1))
-                set_relay_state(self.handle, new_state)
-
-                self.relay_states[relay_num - 1] = False
+                self.shown_mask = new_state
                 self.update_status_leds()
 
-                device = self.devices[self.device_choice.GetSelection()]
-                self.cli_text.SetValue(
-                    f"sainsmart_fdti_relay_control.exe --device-serial {device['serial']} --off {relay_num}"
-                )
-
-            except RelayControlException as e:
-                wx.MessageBox(f"Command failed:\n{e.message}",
-                              "Error", wx.OK | wx.ICON_ERROR)
-                if isinstance(e, DeviceDisconnectedError):
-                    self.disconnect()
+                self.set_cli_text(f"{self.cli_prefix} {cli_args}")
+            finally:
+                self.Thaw()
+
+        def set_cli_text(self, text):
+            """Show text in the CLI box, leaving the control alone if unchanged"""
+            # ChangeValue, unlike SetValue, does not send EVT_TEXT
+            if self.cli_text.GetValue() != text:
+                self.cli_text.ChangeValue(text)
+
+        def on_relay_io_error(self, error):
+            """Report a relay command that failed on the I/O thread"""
+            # Fall back to the last state the device confirmed
+            self.state_mask = self.shown_mask
+            wx.MessageBox(f"Command failed:\n{error.message}",
+                          "Error", wx.OK | wx.ICON_ERROR)
+            if isinstance(error, DeviceDisconnectedError) and self.is_connected:
+                self.disconnect()
 
-        def on_relay_toggle(self, relay_num):
-            """Toggle specific relay"""
+        def on_relay_on(self, relay_num, event=None):
+            """Turn on specific relay"""
             if not self.is_connected:
                 return
 
-            try:
-                current_state = get_relay_state(self.handle)
-                new_state = current_state ^ (1 << (relay_num - 1))
-                set_relay_state(self.handle, new_state)
-
-                self.relay_states[relay_num - 1] = not self.relay_states[relay_num - 1]
-                self.update_status_leds()
-
-                device = self.devices[self.device_choice.GetSelection()]
-                self.cli_text.SetValue(
-                    f"sainsmart_fdti_relay_control.exe --device-serial {device['serial']} --toggle {relay_num}"
-                )
+            self.write_relay_state(self.state_mask | (1 << (relay_num - 1)), f"--on {relay_num}")
 
-            except RelayControlException as e:
-                wx.MessageBox(f"Command failed:\n{e.message}",
-                              "Error", wx.OK | wx.ICON_ERROR)
-                if isinstance(e, DeviceDisconnectedError):
-                    self.disconnect()
-
-        def on_all_on(self, event):
-            """Turn all relays on"""
+        def on_relay_off(self, relay_num, event=None):
+            """Turn off specific relay"""
             if not self.is_connected:
                 return
 
-            try:
-                set_relay_state(self.handle, 0x0F)
-                self.relay_states = [True, True, True, True]
-                self.update_status_leds()
+            self.write_relay_state(self.state_mask & ~(1 << (relay_num - 1)), f"--off {relay_num}")
 
-                device = self.devices[self.device_choice.GetSelection()]
-                self.cli_text.SetValue(
-                    f"sainsmart_fdti_relay_control.exe --device-serial {device['serial']} --state 1 2 3 4"
-                )
+        def on_relay_toggle(self, relay_num, event=None):
+            """Toggle specific relay"""
+            if not self.is_connected:
+                return
 
-            except RelayControlException as e:
-                wx.MessageBox(f"Command failed:\n{e.message}",
-                              "Error", wx.OK | wx.ICON_ERROR)
-                if isinstance(e, DeviceDisconnectedError):
-                    self.disconnect()
+            self.write_relay_state(self.state_mask ^ (1 << (relay_num - 1)), f"--toggle {relay_num}")
 
-        def on_all_off(self, event):
-            """Turn all relays off"""
-            if not self.is_connected:
+        def set_all(self, mask, cli_args):
+            """Set every relay at once, doing nothing if they already match mask"""
+            if not self.is_connected or self.state_mask == mask:
                 return
 
-            try:
-                set_relay_state(self.handle, 0x00)
-                self.relay_states = [False, False, False, False]
-                self.update_status_leds()
+            self.write_relay_state(mask, cli_args)
 
-                device = self.devices[self.device_choice.GetSelection()]
-                self.cli_text.SetValue(
-                    f"sainsmart_fdti_relay_control.exe --device-serial {device['serial']} --state"
-                )
+        def on_all_on(self, event):
+            """Turn all relays on"""
+            self.set_all(0x0F, "--state 1 2 3 4")
 
-            except RelayControlException as e:
-                wx.MessageBox(f"Command failed:\n{e.message}",
-                              "Error", wx.OK | wx.ICON_ERROR)
-                if isinstance(e, DeviceDisconnectedError):
-                    self.disconnect()
+        def on_all_off(self, event):
+            """Turn all relays off"""
+            self.set_all(0x00, "--state")
 
         def on_copy_cli(self, event):
             """Copy CLI command to clipboard"""
-            if wx.TheClipboard.Open():
-                wx.TheClipboard.SetData(wx.TextDataObject(self.cli_text.GetValue()))
-                wx.TheClipboard.Close()
+            clipboard = wx.TheClipboard
+            if not clipboard.IsOpened() and clipboard.Open():
+                try:
+                    clipboard.SetData(wx.TextDataObject(self.cli_text.GetValue()))
+                finally:
+                    clipboard.Close()
                 self.SetStatusText("CLI command copied to clipboard")
 
+    return RelayControlFrame
+
 
 # ============================================================================
 # MAIN ENTRY POINT
@@ -1108,6 +1448,8 @@ def main():
     """Main entry point - determines CLI or GUI mode"""
     if len(sys.argv) > 1:
         # CLI mode
+        import argparse
+
         parser = argparse.ArgumentParser(
             description="SainSmart 4-Relay Control",
             add_help=False
@@ -1161,14 +1503,20 @@ def main():
 
     else:
         # GUI mode
-        if wx is None:
+        try:
+            frame_class = load_gui()
+        except ImportError:
             print("Error: wxPython not installed. Cannot launch GUI.")
             print("Install with: pip install wxPython")
             print("Or use CLI mode: sainsmart_fdti_relay_control.exe --help")
             sys.exit(1)
 
+        # Load the FTDI driver up front: device scans run on a worker thread,
+        # where a missing driver could not end the program
+        _ftd()
+
         app = wx.App()
-        frame = RelayControlFrame()
+        frame = frame_class()
         frame.Show()
         app.MainLoop()
 